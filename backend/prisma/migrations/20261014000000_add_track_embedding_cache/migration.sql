@@ -0,0 +1,12 @@
+-- Content-hash cache for CLAP embeddings
+-- Keyed by a hash of the audio file's size, head and tail, so re-queued or
+-- duplicate files reuse an existing embedding instead of re-running CLAP
+
+CREATE TABLE "track_embedding_cache" (
+    "hash" BYTEA NOT NULL,
+    "embedding" vector(512) NOT NULL,
+    "model_version" VARCHAR(50) NOT NULL,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "track_embedding_cache_pkey" PRIMARY KEY ("hash")
+);
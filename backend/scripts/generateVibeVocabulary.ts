@@ -5,6 +5,7 @@ import { randomUUID } from "crypto";
 import { writeFileSync } from "fs";
 import { join } from "path";
 import { VOCAB_DEFINITIONS, VOCABULARY_TERMS } from "../src/data/featureProfiles";
+import { decodeClapEmbedding } from "../src/utils/clapEmbedding";
 
 const REDIS_URL = process.env.REDIS_URL || "redis://localhost:6379";
 
@@ -40,7 +41,7 @@ async function getClapTextEmbedding(
                     if (data.error) {
                         reject(new Error(data.error));
                     } else {
-                        resolve(data.embedding);
+                        resolve(decodeClapEmbedding(data.embedding));
                     }
                 } catch (e) {
                     reject(new Error("Invalid response"));
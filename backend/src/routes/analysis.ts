@@ -529,6 +529,8 @@ router.post("/vibe/start", requireAuth, requireAdmin, async (req, res) => {
 
         if (force) {
             await prisma.$executeRaw`DELETE FROM track_embeddings`;
+            // Forced re-generation must not be short-circuited by the content-hash cache
+            await prisma.$executeRaw`DELETE FROM track_embedding_cache`;
             await enrichmentFailureService.clearAllFailures("vibe");
             logger.info("Cleared all vibe embeddings for re-generation");
         }
@@ -3,6 +3,7 @@ import { randomUUID } from "crypto";
 import { logger } from "../utils/logger";
 import { prisma } from "../utils/db";
 import { redisClient } from "../utils/redis";
+import { decodeClapEmbedding } from "../utils/clapEmbedding";
 import { requireAuth } from "../middleware/auth";
 import { findSimilarTracks } from "../services/hybridSimilarity";
 import {
@@ -151,7 +152,7 @@ router.post("/search", requireAuth, async (req, res) => {
                     if (data.error) {
                         rejectEmbedding!(new Error(data.error));
                     } else {
-                        resolveEmbedding!(data.embedding);
+                        resolveEmbedding!(decodeClapEmbedding(data.embedding));
                     }
                 } catch (e) {
                     rejectEmbedding!(new Error("Invalid response from analyzer"));
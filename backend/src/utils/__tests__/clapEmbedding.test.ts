@@ -0,0 +1,16 @@
+import { decodeClapEmbedding } from "../clapEmbedding";
+
+describe("decodeClapEmbedding", () => {
+    it("decodes base64 little-endian float32 payloads", () => {
+        const values = [0.5, -1.25, 3];
+        const bytes = Buffer.alloc(values.length * 4);
+        values.forEach((v, i) => bytes.writeFloatLE(v, i * 4));
+
+        expect(decodeClapEmbedding(bytes.toString("base64"))).toEqual(values);
+    });
+
+    it("passes legacy number arrays through unchanged", () => {
+        const legacy = [0.1, 0.2, 0.3];
+        expect(decodeClapEmbedding(legacy)).toBe(legacy);
+    });
+});
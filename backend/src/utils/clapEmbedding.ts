@@ -0,0 +1,19 @@
+/**
+ * Decode the embedding field of a CLAP text-embed pub/sub response.
+ *
+ * Protocol v2 analyzers send the vector as base64-encoded little-endian
+ * float32 bytes (~2.7 KB instead of ~10 KB of JSON floats); older analyzers
+ * send a plain number array, which is passed through unchanged.
+ */
+export function decodeClapEmbedding(embedding: string | number[]): number[] {
+    if (Array.isArray(embedding)) {
+        return embedding;
+    }
+
+    const bytes = Buffer.from(embedding, "base64");
+    const result = new Array<number>(bytes.length / 4);
+    for (let i = 0; i < result.length; i++) {
+        result[i] = bytes.readFloatLE(i * 4);
+    }
+    return result;
+}
@@ -15,24 +15,32 @@ Features:
 
 Architecture:
 - CLAPAnalyzer: Model loading and embedding generation
+- InferenceService: Single thread that batches all CLAP forward passes
 - Worker: Queue consumer that processes tracks and stores embeddings
 - TextEmbedHandler: Real-time text embedding via Redis pub/sub
 """
 
 import os
 import sys
+import base64
 import signal
-import json
 import time
 import logging
 import gc
+import hashlib
+import io
+from collections import OrderedDict
+import queue
+import struct
 import threading
-from datetime import datetime
-from typing import Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 import traceback
 import numpy as np
 import librosa
 import requests
+import orjson
 
 # CPU thread limiting must be set before importing torch
 THREADS_PER_WORKER = int(os.getenv('THREADS_PER_WORKER', '1'))
@@ -41,6 +49,17 @@ os.environ['OPENBLAS_NUM_THREADS'] = str(THREADS_PER_WORKER)
 os.environ['MKL_NUM_THREADS'] = str(THREADS_PER_WORKER)
 os.environ['NUMEXPR_MAX_THREADS'] = str(THREADS_PER_WORKER)
 
+# Optional CPU pinning, cpulist syntax like Redis server_cpulist (e.g. "0-3,8").
+# INFERENCE_CPU_LIST pins the inference thread (and sizes torch's intra-op pool to it);
+# WORKER_CPU_LIST spreads worker threads one core each, round-robin. Unset = no pinning.
+# "auto" gives each worker one of the first NUM_WORKERS allowed CPUs and the inference
+# thread all the rest.
+INFERENCE_CPU_LIST = os.getenv('INFERENCE_CPU_LIST', '')
+WORKER_CPU_LIST = os.getenv('WORKER_CPU_LIST', '')
+if INFERENCE_CPU_LIST:
+    # Keep Intel OpenMP threads on the pinned cores instead of migrating
+    os.environ.setdefault('KMP_AFFINITY', 'granularity=fine,compact,1,0')
+
 import torch
 torch.set_num_threads(THREADS_PER_WORKER)
 
@@ -54,7 +73,9 @@ else:
 
 import redis
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extensions import adapt, register_adapter
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 from pgvector.psycopg2 import register_vector
 
 logging.basicConfig(
@@ -69,22 +90,150 @@ DATABASE_URL = os.getenv('DATABASE_URL', '')
 MUSIC_PATH = os.getenv('MUSIC_PATH', '/music')
 SLEEP_INTERVAL = int(os.getenv('SLEEP_INTERVAL', '5'))
 NUM_WORKERS = int(os.getenv('NUM_WORKERS', '2'))
+# Max jobs drained from the queue per iteration and embedded in one forward pass
+BATCH_SIZE = max(1, int(os.getenv('BATCH_SIZE', '8')))
+# Backfill fast path: while the queue is deeper than COPY_QUEUE_THRESHOLD, buffer
+# completed embeddings and write them with a binary COPY every COPY_BATCH_SIZE rows.
+# Buffered rows are also flushed after COPY_MAX_BUFFER_SECONDS so tracks don't sit
+# in 'processing' long enough for the backend's stale-job cleanup to reset them.
+COPY_QUEUE_THRESHOLD = int(os.getenv('COPY_QUEUE_THRESHOLD', '1000'))
+COPY_BATCH_SIZE = int(os.getenv('COPY_BATCH_SIZE', '1000'))
+COPY_MAX_BUFFER_SECONDS = int(os.getenv('COPY_MAX_BUFFER_SECONDS', '300'))
 BACKEND_URL = os.getenv('BACKEND_URL', 'http://backend:3006')
 MODEL_IDLE_TIMEOUT = int(os.getenv('MODEL_IDLE_TIMEOUT', '300'))
+# Dynamic INT8 quantization of Linear layers for CPU inference (VNNI-accelerated GEMMs).
+# Off by default: embeddings drift slightly from FP32, so enable it for a fresh library
+# or re-analyze existing tracks after switching.
+QUANTIZE_INT8 = os.getenv('QUANTIZE_INT8', 'false').lower() == 'true'
+# Bulk backfill: drop the ANN index at startup so inserts skip index maintenance, and
+# rebuild it once the backlog is drained or on shutdown. Building IVFFlat after the data
+# is loaded is much faster and also trains its lists on real vectors instead of a
+# near-empty table.
+BACKFILL_MODE = os.getenv('BACKFILL_MODE', 'false').lower() == 'true'
+INDEX_BUILD_WORKERS = int(os.getenv('INDEX_BUILD_WORKERS', '2'))
+INDEX_BUILD_MEMORY = os.getenv('INDEX_BUILD_MEMORY', '512MB')  # maintenance_work_mem for the build
 
 # Queue and channel names
 ANALYSIS_QUEUE = 'audio:clap:queue'
 TEXT_EMBED_CHANNEL = 'audio:text:embed'
 TEXT_EMBED_RESPONSE_PREFIX = 'audio:text:embed:response:'
+TEXT_EMBED_CACHE_PREFIX = 'audio:text:embed:cache:'
 CONTROL_CHANNEL = 'audio:clap:control'
+# Text-embed response protocol: v2 sends the embedding as base64 little-endian float32
+TEXT_EMBED_PROTOCOL_VERSION = 2
 
-# Model version identifier
-MODEL_VERSION = 'laion-clap-music-v1'
+# Model version identifier. v2: mean of 10 s windows (v1 was one random 10 s crop)
+MODEL_VERSION = 'laion-clap-music-v2'
+# Content-cache entries also record the quantization mode: INT8 vectors drift
+# slightly from FP32, so the two must never be served for each other
+EMBEDDING_CACHE_VERSION = f"{MODEL_VERSION}:int8" if QUANTIZE_INT8 else MODEL_VERSION
 
 # Audio processing: extract middle segment for consistent, efficient embedding
 # 60 seconds captures the "vibe" without intros/outros and reduces memory usage
 MAX_AUDIO_DURATION = 60  # seconds
 CLAP_SAMPLE_RATE = 48000  # 48kHz for CLAP model
+# CLAP's audio encoder sees 10 s clips and randomly crops anything longer, so the
+# segment is split into 10 s windows whose embeddings are averaged instead
+CLAP_WINDOW_SAMPLES = 10 * CLAP_SAMPLE_RATE
+# Upper bound on 10 s clips per forward pass (bounds activation memory)
+MAX_CLIPS_PER_FORWARD = max(1, int(os.getenv('MAX_CLIPS_PER_FORWARD', '32')))
+
+# Errors meaning the connection itself is gone (reconnect and retry, don't mark tracks failed)
+DB_CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+# Content hash over the head and tail of each file keys the embedding cache, so
+# re-queued tracks (retries, watcher double-fires, moves) skip CLAP entirely
+FILE_HASH_CHUNK = 1024 * 1024  # bytes hashed from each sampled region of the file
+# Threads per worker for file existence checks and hashing (hides NFS/SMB latency)
+FILE_IO_THREADS = 8
+
+# PostgreSQL binary COPY framing
+PGCOPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+PGCOPY_TRAILER = struct.pack('!h', -1)
+PG_EPOCH = datetime(2000, 1, 1)
+
+# Conflict action shared by every track_embeddings upsert. Retries that recompute
+# the same vector leave the row (and index) untouched.
+EMBEDDING_UPSERT_CONFLICT = """
+    ON CONFLICT (track_id)
+    DO UPDATE SET
+        embedding = EXCLUDED.embedding,
+        model_version = EXCLUDED.model_version,
+        analyzed_at = EXCLUDED.analyzed_at
+    WHERE track_embeddings.embedding IS DISTINCT FROM EXCLUDED.embedding
+       OR track_embeddings.model_version IS DISTINCT FROM EXCLUDED.model_version
+"""
+
+# ANN index on track_embeddings; must match the definition in the Prisma migrations
+EMBEDDING_INDEX_NAME = 'track_embeddings_embedding_idx'
+EMBEDDING_INDEX_DDL = f"""
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS "{EMBEDDING_INDEX_NAME}" ON "track_embeddings"
+    USING ivfflat ("embedding" vector_cosine_ops) WITH (lists = 224)
+"""
+
+# Threads decoding/resampling audio for the inference thread (libsndfile and soxr
+# release the GIL, so decodes run in parallel with each other and with CLAP)
+DECODE_THREADS = max(1, int(os.getenv('DECODE_THREADS', '4')))
+
+# Max text prompts kept in the in-process embedding cache (UI queries repeat heavily)
+TEXT_CACHE_SIZE = int(os.getenv('TEXT_CACHE_SIZE', '4096'))
+# Text embeddings are also kept in Redis so restarts don't start with a cold cache
+TEXT_CACHE_TTL = 86400  # seconds
+
+# How long the inference thread waits for more requests before running a partial batch
+INFERENCE_BATCH_WAIT = 0.02  # seconds
+
+
+def _parse_cpu_list(value: str) -> List[int]:
+    """Parse a cpulist string ("0-3,8,10-11") into sorted CPU ids"""
+    cpus = set()
+    try:
+        for part in value.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            if '-' in part:
+                first, last = part.split('-', 1)
+                cpus.update(range(int(first), int(last) + 1))
+            else:
+                cpus.add(int(part))
+    except ValueError:
+        logger.warning(f"Ignoring invalid CPU list: {value!r}")
+        return []
+    return sorted(cpus)
+
+
+def _resolve_cpu_list(value: str, role: str) -> List[int]:
+    """
+    Resolve INFERENCE_CPU_LIST / WORKER_CPU_LIST for role 'inference' or 'worker'.
+
+    "auto" splits the CPUs this process may run on: workers get one core each
+    from the front, inference gets the remainder. With no core left over for
+    inference, both stay unpinned.
+    """
+    if value.strip().lower() != 'auto':
+        return _parse_cpu_list(value)
+    try:
+        allowed = sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        allowed = list(range(os.cpu_count() or 1))
+    if len(allowed) <= NUM_WORKERS:
+        return []
+    return allowed[NUM_WORKERS:] if role == 'inference' else allowed[:NUM_WORKERS]
+
+
+def _pin_current_thread(cpus: List[int], label: str) -> bool:
+    """Pin the calling thread to the given CPUs (Linux only)"""
+    if not cpus or not hasattr(os, 'sched_setaffinity'):
+        return False
+    try:
+        # pid 0 = calling thread
+        os.sched_setaffinity(0, cpus)
+        logger.info(f"{label} pinned to CPUs {cpus}")
+        return True
+    except (OSError, ValueError) as e:
+        logger.warning(f"Failed to pin {label} to CPUs {cpus}: {e}")
+        return False
 
 
 class CLAPAnalyzer:
@@ -98,12 +247,31 @@ class CLAPAnalyzer:
 
     def __init__(self):
         self.model = None
+        # Guards model load/unload; forward passes are serialized by the inference thread
         self._lock = threading.Lock()
         self.last_work_time: float = time.time()
         self._model_loaded = False
+        self.inference = InferenceService(self)
+        # Decode threads share the worker cores when WORKER_CPU_LIST is set
+        self._decode_pool = ThreadPoolExecutor(
+            max_workers=DECODE_THREADS,
+            thread_name_prefix='AudioDecode',
+            initializer=_pin_current_thread,
+            initargs=(_resolve_cpu_list(WORKER_CPU_LIST, 'worker'), 'Audio decode thread')
+        )
+        # LRU of prompt -> read-only embedding
+        self._text_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._text_cache_lock = threading.Lock()
+
+    def load_model(self, warmup: bool = True):
+        """
+        Load the CLAP model (thread-safe, idempotent).
 
-    def load_model(self):
-        """Load the CLAP model (thread-safe, idempotent)"""
+        Args:
+            warmup: Run a dummy forward after loading. Reloads triggered by
+                incoming work skip it, since the real request warms the model
+                just as well and shouldn't wait behind a synthetic one.
+        """
         with self._lock:
             if self.model is not None:
                 return
@@ -120,6 +288,27 @@ class CLAPAnalyzer:
 
                 # Move to detected device (GPU if available, else CPU)
                 self.model = self.model.to(DEVICE).eval()
+                # Inference only: freeze parameters so no autograd state is kept.
+                # (torch.set_grad_enabled is thread-local; InferenceService sets it on its own thread.)
+                self.model.requires_grad_(False)
+
+                if QUANTIZE_INT8:
+                    if DEVICE.type == 'cpu':
+                        torch.ao.quantization.quantize_dynamic(
+                            self.model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+                        )
+                        # Logged so a slow INT8 run can be traced to a CPU without AVX512-class kernels
+                        get_capability = getattr(torch.backends.cpu, 'get_cpu_capability', None)
+                        capability = get_capability() if get_capability else 'unknown'
+                        logger.info(
+                            f"CLAP Linear layers quantized to INT8 "
+                            f"(engine: {torch.backends.quantized.engine}, CPU capability: {capability})"
+                        )
+                    else:
+                        logger.warning("QUANTIZE_INT8 is CPU-only, ignoring on GPU")
+
+                if warmup:
+                    self._warmup()
                 self._model_loaded = True
                 self.last_work_time = time.time()
 
@@ -132,6 +321,25 @@ class CLAPAnalyzer:
                 traceback.print_exc()
                 raise
 
+    def _warmup(self):
+        """
+        Run one silent 10 s clip and one prompt through the model so
+        oneDNN/cuDNN kernel selection and buffer allocation happen at load
+        time instead of inside the first real request.
+        """
+        start = time.time()
+        try:
+            with torch.inference_mode():
+                self.model.get_audio_embedding_from_data(
+                    [np.zeros(CLAP_WINDOW_SAMPLES, dtype=np.float32)],
+                    use_tensor=False
+                )
+                self.model.get_text_embedding(['warmup'], use_tensor=False)
+            logger.info(f"CLAP model warmed up in {time.time() - start:.1f}s")
+        except Exception as e:
+            # The model itself loaded fine; the first request just pays the cost
+            logger.warning(f"CLAP warmup failed: {e}")
+
     def unload_model(self):
         """Unload the CLAP model to free memory"""
         with self._lock:
@@ -155,7 +363,7 @@ class CLAPAnalyzer:
         """Ensure model is loaded, reloading if it was unloaded for idle"""
         if self.model is None:
             logger.info("Reloading CLAP model (new work arrived)...")
-            self.load_model()
+            self.load_model(warmup=False)
 
     def _load_audio_chunk(self, audio_path: str, duration_hint: Optional[float] = None) -> Tuple[Optional[np.ndarray], int]:
         """
@@ -183,11 +391,12 @@ class CLAPAnalyzer:
                     sr=CLAP_SAMPLE_RATE,
                     offset=offset,
                     duration=MAX_AUDIO_DURATION,
-                    mono=True
+                    mono=True,
+                    dtype=np.float32
                 )
             else:
                 # Short track, load entirely
-                audio, sr = librosa.load(audio_path, sr=CLAP_SAMPLE_RATE, mono=True)
+                audio, sr = librosa.load(audio_path, sr=CLAP_SAMPLE_RATE, mono=True, dtype=np.float32)
 
             return audio, sr
 
@@ -196,93 +405,402 @@ class CLAPAnalyzer:
             traceback.print_exc()
             return None, 0
 
-    def get_audio_embedding(self, audio_path: str, duration: Optional[float] = None) -> Optional[np.ndarray]:
+    def get_audio_embeddings(self, items: List[Tuple[str, Optional[float]]]) -> List[Optional[np.ndarray]]:
         """
-        Generate a 512-dimensional embedding from an audio file.
+        Generate 512-dimensional embeddings for a batch of audio files.
 
-        Extracts the middle 60 seconds of the track for embedding, which
-        captures the vibe while avoiding intros/outros and reducing memory.
+        Decodes the middle 60 seconds of each track on the decode pool and
+        hands each array to the inference thread as soon as it's ready, which
+        batches it (with requests from other workers) into a single forward
+        pass. Decoding the rest of the batch overlaps with that forward.
 
         Args:
-            audio_path: Path to the audio file
-            duration: Pre-computed duration in seconds (avoids file read)
+            items: List of (audio_path, duration) tuples; duration may be None
 
         Returns:
-            numpy array of shape (512,) or None on error
+            List aligned with items: numpy array of shape (512,) or None on error
         """
-        self.ensure_model()
         self.last_work_time = time.time()
 
+        results: List[Optional[np.ndarray]] = [None] * len(items)
+        pending = list(self._decode_pool.map(lambda item: self._decode_and_submit(*item), items))
+
+        for i, future in enumerate(pending):
+            if future is None:
+                continue
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                logger.error(f"Failed to generate audio embedding for {items[i][0]}: {e}")
+
+        return results
+
+    def _decode_and_submit(self, audio_path: str, duration: Optional[float]) -> Optional[Future]:
+        """Decode one track (decode pool) and queue it for inference"""
         if not os.path.exists(audio_path):
             logger.error(f"Audio file not found: {audio_path}")
             return None
 
-        try:
-            # Load audio (with chunking), use provided duration to skip file probe
-            audio, sr = self._load_audio_chunk(audio_path, duration)
+        # Load audio (with chunking), use provided duration to skip file probe
+        audio, sr = self._load_audio_chunk(audio_path, duration)
+        if audio is None:
+            return None
+
+        logger.debug(f"Loaded audio: {len(audio)/sr:.1f}s at {sr}Hz")
+        return self.inference.submit_audio(audio)
+
+    def get_text_embedding(self, text: str, redis_client=None) -> Optional[np.ndarray]:
+        """
+        Generate a 512-dimensional embedding from a text query.
+
+        Results are kept in an LRU cache of TEXT_CACHE_SIZE prompts, so
+        repeated queries skip the text encoder entirely. With a Redis client,
+        misses also check (and fill) a shared cache that survives restarts.
 
-            if audio is None:
+        Args:
+            text: Natural language description (e.g., "upbeat electronic dance music")
+            redis_client: Optional Redis client for the persistent cache
+
+        Returns:
+            Read-only numpy array of shape (512,) or None on error
+        """
+        self.last_work_time = time.time()
+
+        if not text or not text.strip():
+            logger.error("Empty text provided for embedding")
+            return None
+
+        # Collapse whitespace only: CLAP's tokenizer is case-sensitive, so
+        # lowercasing would change the embedding returned for a prompt
+        key = ' '.join(text.split())
+
+        with self._text_cache_lock:
+            cached = self._text_cache.get(key)
+            if cached is not None:
+                self._text_cache.move_to_end(key)
+                return cached
+
+        # INT8 text embeddings differ slightly, so they get their own entries
+        redis_key = TEXT_EMBED_CACHE_PREFIX + hashlib.sha1(
+            f"{MODEL_VERSION}:{'int8' if QUANTIZE_INT8 else 'fp32'}:{key}".encode('utf-8')
+        ).hexdigest()
+        embedding = None
+        if redis_client is not None:
+            try:
+                cached_bytes = redis_client.get(redis_key)
+                if cached_bytes:
+                    # Zero-copy view on little-endian hosts; cached arrays are read-only anyway
+                    embedding = np.frombuffer(cached_bytes, dtype='<f4').astype(np.float32, copy=False)
+            except Exception as e:
+                logger.debug(f"Text embedding cache read failed: {e}")
+
+        if embedding is None:
+            try:
+                embedding = self.inference.submit_text(key).result()
+            except Exception as e:
+                logger.error(f"Failed to generate text embedding: {e}")
                 return None
 
-            logger.debug(f"Loaded audio: {len(audio)/sr:.1f}s at {sr}Hz")
+            if redis_client is not None:
+                try:
+                    redis_client.set(
+                        redis_key, embedding.astype('<f4', copy=False).tobytes(), ex=TEXT_CACHE_TTL
+                    )
+                except Exception as e:
+                    logger.debug(f"Text embedding cache write failed: {e}")
 
-            with self._lock:
-                # Use get_audio_embedding_from_data for pre-loaded audio
-                # This gives us control over memory usage
-                embeddings = self.model.get_audio_embedding_from_data(
-                    [audio],
-                    use_tensor=False
-                )
+        # Cached arrays are shared between callers
+        embedding.flags.writeable = False
+        with self._text_cache_lock:
+            self._text_cache[key] = embedding
+            self._text_cache.move_to_end(key)
+            while len(self._text_cache) > TEXT_CACHE_SIZE:
+                self._text_cache.popitem(last=False)
 
-                # Result is shape (1, 512) for HTSAT-base model, normalized
-                embedding = embeddings[0]
+        return embedding
 
-                if embedding.shape[0] != 512:
-                    logger.warning(f"Unexpected embedding dimension: {embedding.shape}")
+    def embed_audio_batch(self, audio_batch: List[np.ndarray], between_forwards=None) -> List[np.ndarray]:
+        """
+        Embed pre-loaded audio as the L2-normalized mean of its 10 s windows.
 
-                return embedding.astype(np.float32)
+        All windows of all tracks go through CLAP together (in forwards of at
+        most MAX_CLIPS_PER_FORWARD clips). Exact 10 s windows bypass CLAP's
+        random crop, so the result is deterministic and covers the whole
+        segment. Called only from the inference thread.
 
-        except Exception as e:
-            logger.error(f"Failed to generate audio embedding for {audio_path}: {e}")
-            traceback.print_exc()
-            return None
+        Args:
+            audio_batch: List of mono float32 arrays at CLAP_SAMPLE_RATE
+            between_forwards: Optional callable run between forwards, which
+                InferenceService uses to answer queued text requests
 
-    def get_text_embedding(self, text: str) -> Optional[np.ndarray]:
+        Returns:
+            List of float32 arrays of shape (512,), aligned with audio_batch
         """
-        Generate a 512-dimensional embedding from a text query.
+        self.ensure_model()
+        self.last_work_time = time.time()
+        model = self.model
+
+        clips = []
+        bounds = []
+        for audio in audio_batch:
+            start = len(clips)
+            # Full windows only; a track shorter than 10 s is one clip (CLAP repeat-pads it)
+            windows = [
+                audio[i:i + CLAP_WINDOW_SAMPLES]
+                for i in range(0, len(audio) - CLAP_WINDOW_SAMPLES + 1, CLAP_WINDOW_SAMPLES)
+            ]
+            # Cover a tail of at least half a window with a final window that
+            # overlaps the previous one, rather than a mostly padded clip
+            if windows and len(audio) % CLAP_WINDOW_SAMPLES >= CLAP_WINDOW_SAMPLES // 2:
+                windows.append(audio[-CLAP_WINDOW_SAMPLES:])
+            clips.extend(windows or [audio])
+            bounds.append((start, len(clips)))
+
+        clip_chunks = []
+        with torch.inference_mode():
+            for i in range(0, len(clips), MAX_CLIPS_PER_FORWARD):
+                if i and between_forwards:
+                    between_forwards()
+                # Use get_audio_embedding_from_data for pre-loaded audio
+                # This gives us control over memory usage
+                clip_chunks.append(model.get_audio_embedding_from_data(
+                    clips[i:i + MAX_CLIPS_PER_FORWARD],
+                    use_tensor=False
+                ))
+        clip_embeddings = np.concatenate(clip_chunks)
+
+        # Result is shape (clips, 512) for HTSAT-base model, normalized
+        if clip_embeddings.shape[1] != 512:
+            logger.warning(f"Unexpected embedding dimension: {clip_embeddings.shape}")
+
+        # Sum each track's windows in one pass, then L2-normalize in place; the
+        # mean's 1/n scale cancels out under normalization
+        embeddings = np.add.reduceat(
+            clip_embeddings.astype(np.float32, copy=False),
+            [start for start, _ in bounds],
+            axis=0
+        )
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-9
+        return list(embeddings)
+
+    def embed_text_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """
+        Run one CLAP forward pass over text prompts.
+
+        Called only from the inference thread.
 
         Args:
-            text: Natural language description (e.g., "upbeat electronic dance music")
+            texts: List of natural language prompts
 
         Returns:
-            numpy array of shape (512,) or None on error
+            List of float32 arrays of shape (512,), aligned with texts
         """
         self.ensure_model()
         self.last_work_time = time.time()
+        model = self.model
 
-        if not text or not text.strip():
-            logger.error("Empty text provided for embedding")
-            return None
+        with torch.inference_mode():
+            embeddings = model.get_text_embedding(
+                texts,
+                use_tensor=False
+            )
+
+        if embeddings.shape[1] != 512:
+            logger.warning(f"Unexpected text embedding dimension: {embeddings.shape}")
+
+        return list(embeddings.astype(np.float32, copy=False))
+
+
+class InferenceService:
+    """
+    Dedicated thread that owns every CLAP forward pass.
+
+    Workers and the text handler submit requests and receive a Future.
+    The service drains its queue into batches of up to BATCH_SIZE requests,
+    so callers overlap their own IO (Redis, PostgreSQL, audio decode) with
+    inference instead of contending on a lock around the model. Text
+    requests are answered between the audio forwards of a batch, so a vibe
+    search waits behind at most one MAX_CLIPS_PER_FORWARD forward.
+    """
+
+    def __init__(self, analyzer: CLAPAnalyzer):
+        self.analyzer = analyzer
+        self._queue: "queue.Queue[Tuple[str, object, Future]]" = queue.Queue()
+        # Guards _stopped so nothing is queued after the shutdown drain
+        self._submit_lock = threading.Lock()
+        self._stopped = False
+        # Audio requests pulled off the queue while serving text mid-batch
+        # (inference thread only)
+        self._deferred: List[Tuple[str, object, Future]] = []
+
+    def submit_audio(self, audio: np.ndarray) -> Future:
+        """Queue pre-loaded audio for embedding"""
+        return self._submit('audio', audio)
+
+    def submit_text(self, text: str) -> Future:
+        """Queue a text prompt for embedding"""
+        return self._submit('text', text)
+
+    def _submit(self, kind: str, payload) -> Future:
+        future: Future = Future()
+        with self._submit_lock:
+            if self._stopped:
+                future.set_exception(RuntimeError("Inference service stopped"))
+            else:
+                self._queue.put((kind, payload, future))
+        return future
+
+    def start(self, stop_event: threading.Event):
+        """
+        Run the inference loop until stop_event is set.
+
+        main() sets stop_event only after the workers and text handler have
+        exited, so in-flight jobs finish instead of failing on shutdown.
+        """
+        logger.info("InferenceService starting...")
+
+        # Grad mode is thread-local and this thread runs every forward, so anything
+        # outside the per-call inference_mode blocks stays autograd-free too
+        torch.set_grad_enabled(False)
+
+        cpus = _resolve_cpu_list(INFERENCE_CPU_LIST, 'inference')
+        if _pin_current_thread(cpus, "InferenceService"):
+            # OpenMP workers spawned from this thread inherit its affinity
+            torch.set_num_threads(len(cpus))
 
         try:
-            with self._lock:
-                # CLAP expects a list of text prompts
-                embeddings = self.model.get_text_embedding(
-                    [text],
-                    use_tensor=False
-                )
+            while not stop_event.is_set():
+                if self._deferred:
+                    batch, self._deferred = self._deferred[:BATCH_SIZE], self._deferred[BATCH_SIZE:]
+                else:
+                    try:
+                        batch = [self._queue.get(timeout=1.0)]
+                    except queue.Empty:
+                        continue
 
-                embedding = embeddings[0]
+                # Collect more requests briefly so concurrent workers share a forward
+                deadline = time.time() + INFERENCE_BATCH_WAIT
+                while len(batch) < BATCH_SIZE:
+                    try:
+                        batch.append(self._queue.get(timeout=max(0.0, deadline - time.time())))
+                    except queue.Empty:
+                        break
 
-                if embedding.shape[0] != 512:
-                    logger.warning(f"Unexpected text embedding dimension: {embedding.shape}")
+                self._run_batch(batch)
 
-                return embedding.astype(np.float32)
+        finally:
+            with self._submit_lock:
+                self._stopped = True
+            for _, _, future in self._deferred:
+                future.set_exception(RuntimeError("Inference service stopped"))
+            self._deferred = []
+            while True:
+                try:
+                    _, _, future = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                future.set_exception(RuntimeError("Inference service stopped"))
+            logger.info("InferenceService stopped")
+
+    def _run_batch(self, batch: List[Tuple[str, object, Future]]):
+        """Run one forward per request kind and resolve the futures"""
+        # Text first: it's an interactive search waiting on a pub/sub reply and
+        # takes milliseconds, while an audio batch can take seconds
+        handlers = {
+            'text': self.analyzer.embed_text_batch,
+            'audio': lambda audio: self.analyzer.embed_audio_batch(
+                audio, between_forwards=self._serve_pending_text
+            ),
+        }
+        for kind, embed in handlers.items():
+            requests_of_kind = [(payload, future) for k, payload, future in batch if k == kind]
+            if not requests_of_kind:
+                continue
 
-        except Exception as e:
-            logger.error(f"Failed to generate text embedding: {e}")
-            traceback.print_exc()
-            return None
+            try:
+                embeddings = embed([payload for payload, _ in requests_of_kind])
+                for (_, future), embedding in zip(requests_of_kind, embeddings):
+                    future.set_result(embedding)
+            except Exception as e:
+                logger.error(f"CLAP {kind} inference failed for batch of {len(requests_of_kind)}: {e}")
+                traceback.print_exc()
+                if len(requests_of_kind) == 1:
+                    requests_of_kind[0][1].set_exception(e)
+                    continue
+                # Retry one at a time so a single bad input doesn't fail its batchmates
+                for payload, future in requests_of_kind:
+                    try:
+                        future.set_result(embed([payload])[0])
+                    except Exception as item_error:
+                        future.set_exception(item_error)
+
+    def _serve_pending_text(self):
+        """Answer queued text requests now; queued audio waits for the next batch"""
+        text_batch = []
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            (text_batch if request[0] == 'text' else self._deferred).append(request)
+        if text_batch:
+            self._run_batch(text_batch)
+
+
+# Shared by every DatabaseConnection: one connection per worker plus the idle
+# checker, with a spare so a reconnect never waits on a broken one being discarded
+_db_pool: Optional[ThreadedConnectionPool] = None
+_db_pool_lock = threading.Lock()
+
+
+class _Float32VectorAdapter:
+    """
+    Render float32 ndarrays as vector literals using numpy's float32 str.
+
+    pgvector's own adapter formats each element with str(float(v)), i.e. the
+    float64 repr (np.float32(0.1) is sent as 0.10000000149011612). The
+    shortest float32 round-trip form parses back to the same values and cuts
+    a 512-dim literal from ~10.7 KB to ~6.3 KB.
+    """
+
+    def __init__(self, value: np.ndarray):
+        self._value = value
+
+    def getquoted(self) -> bytes:
+        value = np.asarray(self._value, dtype=np.float32)
+        if value.ndim != 1:
+            raise ValueError('expected ndim to be 1')
+        return adapt('[' + ','.join(map(str, value)) + ']').getquoted()
+
+
+def _get_db_pool(url: str) -> ThreadedConnectionPool:
+    """Create the connection pool on first use and register pgvector once"""
+    global _db_pool
+    with _db_pool_lock:
+        if _db_pool is None:
+            # TCP keepalives surface dead sockets without a preflight ping per query
+            # Open the workers' and idle checker's connections up front
+            pool = ThreadedConnectionPool(
+                NUM_WORKERS + 1, NUM_WORKERS + 2, url,
+                options="-c client_encoding=UTF8",
+                keepalives=1,
+                keepalives_idle=30,
+                keepalives_interval=10,
+                keepalives_count=3
+            )
+            conn = pool.getconn()
+            try:
+                # Register the vector type process-wide (also adapts np.ndarray
+                # parameters), so pooled connections skip the type lookup.
+                # globally= needs pgvector>=0.3.5 and defaults to False from 0.4
+                register_vector(conn, globally=True)
+                conn.commit()
+                # Replaces the ndarray adapter register_vector just installed
+                register_adapter(np.ndarray, _Float32VectorAdapter)
+            finally:
+                pool.putconn(conn)
+            _db_pool = pool
+        return _db_pool
 
 
 class DatabaseConnection:
@@ -293,44 +811,31 @@ class DatabaseConnection:
         self.conn = None
 
     def connect(self):
-        """Establish database connection with pgvector extension"""
+        """Check out a connection from the shared pool"""
         if not self.url:
             raise ValueError("DATABASE_URL not set")
 
-        self.conn = psycopg2.connect(
-            self.url,
-            options="-c client_encoding=UTF8"
-        )
-        self.conn.set_client_encoding('UTF8')
+        self.conn = _get_db_pool(self.url).getconn()
         self.conn.autocommit = False
 
-        # Register pgvector type
-        register_vector(self.conn)
-
         logger.info("Connected to PostgreSQL with pgvector support")
 
-    def is_connected(self) -> bool:
-        """Check if the database connection is alive"""
-        if not self.conn:
-            return False
-        try:
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT 1")
-            cursor.close()
-            return True
-        except Exception:
-            return False
-
     def reconnect(self):
-        """Close existing connection and establish a new one"""
+        """Discard the current connection and check out a fresh one"""
         logger.info("Reconnecting to database...")
-        self.close()
+        self.close(discard=True)
         self.connect()
 
     def get_cursor(self):
-        """Get a database cursor, reconnecting if necessary"""
-        if not self.is_connected():
-            self.reconnect()
+        """
+        Get a database cursor, connecting if there is no open connection.
+
+        Doesn't ping the server: a dropped connection raises
+        DB_CONNECTION_ERRORS on first use and callers reconnect then.
+        """
+        if not self.conn or self.conn.closed:
+            self.close(discard=True)
+            self.connect()
         return self.conn.cursor(cursor_factory=RealDictCursor)
 
     def commit(self):
@@ -341,21 +846,80 @@ class DatabaseConnection:
         if self.conn:
             self.conn.rollback()
 
-    def close(self):
+    def close(self, discard: bool = False):
+        """Return the connection to the pool, closing it if discard or broken"""
         if self.conn:
             try:
-                self.conn.close()
+                _db_pool.putconn(self.conn, close=discard or bool(self.conn.closed))
             except Exception:
                 pass
             self.conn = None
 
 
+def _encode_copy_rows(rows: List[Tuple]) -> io.BytesIO:
+    """
+    Encode (track_id, embedding, model_version, analyzed_at) rows as a
+    PostgreSQL binary COPY stream.
+
+    Vectors use pgvector's binary format: int16 dim, int16 unused, then
+    dim big-endian float32 values. analyzed_at is a naive UTC datetime.
+    """
+    buf = io.BytesIO()
+    buf.write(PGCOPY_HEADER)
+    for track_id, embedding, model_version, analyzed_at in rows:
+        track_id_bytes = track_id.encode('utf-8')
+        model_version_bytes = model_version.encode('utf-8')
+        vector_bytes = embedding.astype('>f4', copy=False).tobytes()
+        micros = (analyzed_at - PG_EPOCH) // timedelta(microseconds=1)
+
+        buf.write(struct.pack('!hi', 4, len(track_id_bytes)))
+        buf.write(track_id_bytes)
+        buf.write(struct.pack('!ihh', 4 + len(vector_bytes), embedding.shape[0], 0))
+        buf.write(vector_bytes)
+        buf.write(struct.pack('!i', len(model_version_bytes)))
+        buf.write(model_version_bytes)
+        buf.write(struct.pack('!iq', 8, micros))
+    buf.write(PGCOPY_TRAILER)
+    buf.seek(0)
+    return buf
+
+
+def _hash_audio_file(path: str) -> Optional[bytes]:
+    """
+    Fast content hash of an audio file: size plus FILE_HASH_CHUNK bytes from
+    its start, middle and end. The ends catch tag and container changes; the
+    middle covers the segment the embedding is computed from. Files no
+    larger than three chunks are hashed whole.
+
+    Returns:
+        16-byte digest, or None if the file can't be read
+    """
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            digest = hashlib.blake2b(str(size).encode('ascii'), digest_size=16)
+            if size <= 3 * FILE_HASH_CHUNK:
+                digest.update(f.read())
+            else:
+                for offset in (0, (size - FILE_HASH_CHUNK) // 2, size - FILE_HASH_CHUNK):
+                    f.seek(offset)
+                    digest.update(f.read(FILE_HASH_CHUNK))
+            return digest.digest()
+    except OSError:
+        return None
+
+
 class Worker:
     """
     Queue worker that processes audio files and stores embeddings.
 
     Polls the Redis queue for jobs, generates CLAP embeddings,
     and stores results in PostgreSQL.
+
+    Workers are plain threads: redis-py and psycopg2 release the GIL while
+    blocked on the network (BLPOP, queries, COPY), and every CLAP forward
+    runs on the InferenceService thread, so worker IO already overlaps
+    inference without an asyncio event loop.
     """
 
     def __init__(self, worker_id: int, analyzer: CLAPAnalyzer, stop_event: threading.Event):
@@ -364,15 +928,28 @@ class Worker:
         self.stop_event = stop_event
         self.redis_client = None
         self.db = None
+        # Completed rows waiting for a COPY flush (backfill mode only)
+        self._copy_buffer: List[Tuple] = []
+        self._copy_hashes: Dict[str, bytes] = {}
+        self._copy_buffer_started: float = 0.0
+        self._file_pool: Optional[ThreadPoolExecutor] = None
 
     def start(self):
         """Start the worker loop"""
         logger.info(f"Worker {self.worker_id} starting...")
 
+        worker_cpus = _resolve_cpu_list(WORKER_CPU_LIST, 'worker')
+        if worker_cpus:
+            core_id = worker_cpus[self.worker_id % len(worker_cpus)]
+            _pin_current_thread([core_id], f"Worker {self.worker_id}")
+
         try:
             self.redis_client = redis.from_url(REDIS_URL)
             self.db = DatabaseConnection(DATABASE_URL)
             self.db.connect()
+            self._file_pool = ThreadPoolExecutor(
+                max_workers=FILE_IO_THREADS, thread_name_prefix=f"Worker-{self.worker_id}-io"
+            )
 
             while not self.stop_event.is_set():
                 # Publish heartbeat for feature detection
@@ -395,102 +972,230 @@ class Worker:
 
         finally:
             if self.db:
+                if self._copy_buffer:
+                    try:
+                        self._flush_copy_buffer()
+                    except Exception as e:
+                        logger.error(f"Worker {self.worker_id} failed to flush buffered embeddings: {e}")
                 self.db.close()
+            if self._file_pool:
+                self._file_pool.shutdown(wait=False)
             logger.info(f"Worker {self.worker_id} stopped")
 
     def _process_job(self):
-        """Process a single job from the queue"""
-        # Try to get a job from the queue (blocking with timeout)
+        """Process a batch of jobs from the queue"""
+        # Block for the first job, then drain up to BATCH_SIZE without waiting
         job_data = self.redis_client.blpop(ANALYSIS_QUEUE, timeout=SLEEP_INTERVAL)
 
         if not job_data:
+            # Queue drained: don't leave backfill rows sitting in the buffer
+            if self._copy_buffer:
+                self._flush_copy_buffer()
             return
 
         _, raw_job = job_data
-        job = json.loads(raw_job)
+        raw_jobs = [raw_job]
+
+        # Drain the rest of the batch and read the backlog depth in one round-trip
+        pipe = self.redis_client.pipeline(transaction=False)
+        if BATCH_SIZE > 1:
+            pipe.lpop(ANALYSIS_QUEUE, BATCH_SIZE - 1)
+        pipe.llen(ANALYSIS_QUEUE)
+        *drained, queue_depth = pipe.execute()
+        if drained:
+            raw_jobs.extend(drained[0] or [])
+
+        jobs = []
+        for raw_job in raw_jobs:
+            # The whole batch is already popped: a bad payload must only drop itself
+            try:
+                job = orjson.loads(raw_job)
+                track_id = job.get('trackId')
+                if not track_id:
+                    logger.warning(f"Invalid job (no trackId): {job}")
+                    continue
+
+                # Build full path (normalize Windows-style paths)
+                normalized_path = job.get('filePath', '').replace('\\', '/')
+                full_path = os.path.join(MUSIC_PATH, normalized_path)
+                duration = job.get('duration')  # Pre-computed duration in seconds
+            except Exception as e:
+                logger.warning(f"Invalid job {raw_job!r}: {e}")
+                continue
+            jobs.append((track_id, full_path, duration))
 
-        track_id = job.get('trackId')
-        file_path = job.get('filePath', '')
-        duration = job.get('duration')  # Pre-computed duration in seconds
+        if not jobs:
+            return
 
-        if not track_id:
-            logger.warning(f"Invalid job (no trackId): {job}")
+        # Drop missing files before touching the DB status or CLAP (stat in parallel)
+        exists = list(self._file_pool.map(os.path.exists, [job[1] for job in jobs]))
+        missing = [job for job, found in zip(jobs, exists) if not found]
+        jobs = [job for job, found in zip(jobs, exists) if found]
+        if missing:
+            for _, full_path, _ in missing:
+                logger.error(f"Audio file not found: {full_path}")
+            self._db_retry(self._mark_failed_batch, [(job[0], "Audio file not found") for job in missing])
+
+        if not jobs:
             return
 
-        logger.info(f"Worker {self.worker_id} processing track: {track_id}")
+        logger.info(f"Worker {self.worker_id} processing batch of {len(jobs)} tracks")
 
         # Update track status to processing
-        self._update_track_status(track_id, 'processing')
+        self._db_retry(self._update_tracks_status, [job[0] for job in jobs], 'processing')
+
+        # Reuse embeddings for files whose content was already analyzed
+        hashes = self._file_pool.map(_hash_audio_file, [job[1] for job in jobs])
+        file_hashes = {
+            job[0]: file_hash for job, file_hash in zip(jobs, hashes) if file_hash is not None
+        }
+        cached = self._db_retry(self._lookup_cached_embeddings, list(set(file_hashes.values())))
+
+        rows = []
+        to_embed = []
+        for job in jobs:
+            track_id = job[0]
+            embedding = cached.get(file_hashes.get(track_id))
+            if embedding is not None:
+                rows.append((track_id, embedding, MODEL_VERSION, datetime.utcnow()))
+            else:
+                to_embed.append(job)
+
+        if cached:
+            logger.info(f"Worker {self.worker_id} reused {len(rows)} cached embeddings")
+
+        # Generate embeddings in one batched forward (pass duration to avoid file probe)
+        embeddings = self.analyzer.get_audio_embeddings(
+            [(full_path, duration) for _, full_path, duration in to_embed]
+        ) if to_embed else []
+
+        failures = []
+        new_hashes = {}
+        for (track_id, _, _), embedding in zip(to_embed, embeddings):
+            if embedding is None:
+                failures.append((track_id, "Failed to generate embedding"))
+                continue
+            rows.append((track_id, embedding, MODEL_VERSION, datetime.utcnow()))
+            if track_id in file_hashes:
+                new_hashes[track_id] = file_hashes[track_id]
+
+        # Large backfill: accumulate rows and bulk-load them with COPY. BACKFILL_MODE
+        # keeps the COPY path for the whole run; the buffer still flushes once the
+        # queue runs dry.
+        backfill = BACKFILL_MODE or queue_depth > COPY_QUEUE_THRESHOLD
+        if rows and (backfill or self._copy_buffer):
+            self._db_retry(self._mark_failed_batch, failures)
+            if not self._copy_buffer:
+                self._copy_buffer_started = time.time()
+            self._copy_buffer.extend(rows)
+            self._copy_hashes.update(new_hashes)
+            buffer_age = time.time() - self._copy_buffer_started
+            if (not backfill or len(self._copy_buffer) >= COPY_BATCH_SIZE
+                    or buffer_age >= COPY_MAX_BUFFER_SECONDS):
+                self._flush_copy_buffer()
+            return
 
-        # Build full path (normalize Windows-style paths)
-        normalized_path = file_path.replace('\\', '/')
-        full_path = os.path.join(MUSIC_PATH, normalized_path)
+        # Store all embeddings in one multi-row upsert
+        stored = self._db_retry(self.store_embeddings_batch, rows, new_hashes) if rows else set()
+        self._finish_stored(rows, stored, failures)
+
+    def _flush_copy_buffer(self):
+        """Write buffered backfill rows via COPY and finalize their tracks"""
+        rows, self._copy_buffer = self._copy_buffer, []
+        file_hashes, self._copy_hashes = self._copy_hashes, {}
+        logger.info(f"Worker {self.worker_id} flushing {len(rows)} embeddings via COPY")
+        self._finish_stored(rows, self._db_retry(self.store_embeddings_copy, rows, file_hashes))
+
+    def _finish_stored(self, rows: List[Tuple], stored: set, failures: Optional[List[Tuple[str, str]]] = None):
+        """Mark stored tracks completed and the rest (plus earlier failures) failed"""
+        failures = list(failures or [])
+        completed = []
+        for track_id, _, _, _ in rows:
+            if track_id in stored:
+                completed.append(track_id)
+            else:
+                failures.append((track_id, "Failed to store embedding"))
 
-        # Generate embedding (pass duration to avoid file probe)
-        embedding = self.analyzer.get_audio_embedding(full_path, duration)
+        self._db_retry(self._update_tracks_status, completed, 'completed')
+        self._db_retry(self._mark_failed_batch, failures)
+        if completed:
+            logger.info(f"Worker {self.worker_id} completed {len(completed)} tracks")
 
-        if embedding is None:
-            self._mark_failed(track_id, "Failed to generate embedding")
+    def _db_retry(self, operation, *args):
+        """Run a DB operation, reconnecting and retrying once if the connection dropped"""
+        try:
+            return operation(*args)
+        except DB_CONNECTION_ERRORS as e:
+            logger.warning(f"Worker {self.worker_id} lost database connection ({e}), retrying")
+            self.db.reconnect()
+            return operation(*args)
+
+    def _update_tracks_status(self, track_ids: List[str], status: str):
+        """Update the vibe analysis status (CLAP embeddings) of several tracks at once"""
+        if not track_ids:
             return
 
-        # Store embedding in database
-        success = self._store_embedding(track_id, embedding)
-
-        if success:
-            self._update_track_status(track_id, 'completed')
-            logger.info(f"Worker {self.worker_id} completed track: {track_id}")
-        else:
-            self._mark_failed(track_id, "Failed to store embedding")
-
-    def _update_track_status(self, track_id: str, status: str):
-        """Update the track's vibe analysis status (CLAP embeddings)"""
         cursor = self.db.get_cursor()
         try:
             cursor.execute("""
                 UPDATE "Track"
                 SET "vibeAnalysisStatus" = %s, "vibeAnalysisStatusUpdatedAt" = NOW()
-                WHERE id = %s
-            """, (status, track_id))
+                WHERE id = ANY(%s)
+            """, (status, track_ids))
             self.db.commit()
+        except DB_CONNECTION_ERRORS:
+            raise
         except Exception as e:
             logger.error(f"Failed to update track vibe status: {e}")
             self.db.rollback()
         finally:
             cursor.close()
 
-    def _mark_failed(self, track_id: str, error: str):
-        """Mark track as failed and record in enrichment failures"""
+    def _mark_failed_batch(self, failures: List[Tuple[str, str]]):
+        """Mark tracks as failed in one statement and record each in enrichment failures"""
+        if not failures:
+            return
+
+        errors = {track_id: error[:500] for track_id, error in failures}
         cursor = self.db.get_cursor()
         try:
-            # Get track name for better failure visibility
-            cursor.execute('SELECT title FROM "Track" WHERE id = %s', (track_id,))
-            row = cursor.fetchone()
-            track_name = row['title'] if row else None
-
+            # Per-row errors via UNNEST; RETURNING gives titles for failure visibility
             cursor.execute("""
-                UPDATE "Track"
+                UPDATE "Track" t
                 SET
                     "vibeAnalysisStatus" = 'failed',
-                    "vibeAnalysisError" = %s,
-                    "vibeAnalysisRetryCount" = COALESCE("vibeAnalysisRetryCount", 0) + 1,
+                    "vibeAnalysisError" = f.error,
+                    "vibeAnalysisRetryCount" = COALESCE(t."vibeAnalysisRetryCount", 0) + 1,
                     "vibeAnalysisStatusUpdatedAt" = NOW()
-                WHERE id = %s
-            """, (error[:500], track_id))
+                FROM UNNEST(%s::text[], %s::text[]) AS f(id, error)
+                WHERE t.id = f.id
+                RETURNING t.id, t.title
+            """, (list(errors.keys()), list(errors.values())))
+            track_names = {row['id']: row['title'] for row in cursor.fetchall()}
             self.db.commit()
-            logger.error(f"Track {track_id} failed: {error}")
+        except DB_CONNECTION_ERRORS:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to mark tracks as failed: {e}")
+            self.db.rollback()
+            return
+        finally:
+            cursor.close()
 
-            # Report failure to backend enrichment failure service
+        # Report failures to backend enrichment failure service
+        headers = {
+            "Content-Type": "application/json",
+            "X-Internal-Secret": os.getenv("INTERNAL_API_SECRET", "")
+        }
+        for track_id, error in errors.items():
+            logger.error(f"Track {track_id} failed: {error}")
             try:
-                headers = {
-                    "Content-Type": "application/json",
-                    "X-Internal-Secret": os.getenv("INTERNAL_API_SECRET", "")
-                }
                 requests.post(
                     f"{BACKEND_URL}/api/analysis/vibe/failure",
                     json={
                         "trackId": track_id,
-                        "trackName": track_name,
-                        "errorMessage": error[:500],
+                        "trackName": track_names.get(track_id),
+                        "errorMessage": error,
                         "errorCode": "VIBE_EMBEDDING_FAILED"
                     },
                     headers=headers,
@@ -499,37 +1204,191 @@ class Worker:
             except Exception as report_err:
                 logger.warning(f"Failed to report failure to backend: {report_err}")
 
+    def _lookup_cached_embeddings(self, file_hashes: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Fetch cached embeddings for the given content hashes (current model and quantization only)"""
+        if not file_hashes:
+            return {}
+
+        cursor = self.db.get_cursor()
+        try:
+            cursor.execute("""
+                SELECT hash, embedding FROM track_embedding_cache
+                WHERE hash = ANY(%s) AND model_version = %s
+            """, (file_hashes, EMBEDDING_CACHE_VERSION))
+            rows = cursor.fetchall()
+            self.db.commit()
+            return {bytes(row['hash']): row['embedding'] for row in rows}
+        except DB_CONNECTION_ERRORS:
+            raise
         except Exception as e:
-            logger.error(f"Failed to mark track as failed: {e}")
+            # The cache is an optimization; fall back to running CLAP
+            logger.warning(f"Embedding cache lookup failed: {e}")
             self.db.rollback()
+            return {}
         finally:
             cursor.close()
 
-    def _store_embedding(self, track_id: str, embedding: np.ndarray) -> bool:
-        """Store the embedding in the track_embeddings table"""
+    def _insert_cache_entries(self, cursor, rows: List[Tuple], file_hashes: Dict[str, bytes]):
+        """Add freshly computed embeddings to track_embedding_cache (same transaction)"""
+        entries = {
+            file_hashes[track_id]: (file_hashes[track_id], embedding, EMBEDDING_CACHE_VERSION)
+            for track_id, embedding, _, _ in rows
+            if track_id in file_hashes
+        }
+        if not entries:
+            return
+
+        execute_values(cursor, """
+            INSERT INTO track_embedding_cache (hash, embedding, model_version)
+            VALUES %s
+            ON CONFLICT (hash)
+            DO UPDATE SET
+                embedding = EXCLUDED.embedding,
+                model_version = EXCLUDED.model_version,
+                created_at = NOW()
+            WHERE track_embedding_cache.model_version <> EXCLUDED.model_version
+        """, list(entries.values()), page_size=500)
+
+    def store_embeddings_batch(self, rows: List[Tuple], file_hashes: Optional[Dict[str, bytes]] = None) -> set:
+        """
+        Store a batch of embeddings with a single multi-row upsert.
+
+        Falls back to per-row inserts if the batch fails (e.g. a track was
+        deleted mid-batch), so one bad row doesn't fail the whole batch.
+
+        Args:
+            rows: List of (track_id, embedding, model_version, analyzed_at), where
+                embedding is the float32 ndarray (adapted by _Float32VectorAdapter)
+            file_hashes: track_id -> content hash for newly computed embeddings,
+                added to the embedding cache alongside the insert
+
+        Returns:
+            Set of track IDs that were stored
+        """
+        # Deduplicate by track_id: ON CONFLICT can't touch the same row twice
+        rows = list({row[0]: row for row in rows}.values())
+
         cursor = self.db.get_cursor()
         try:
-            # Convert numpy array to list for pgvector
-            embedding_list = embedding.tolist()
+            execute_values(cursor, f"""
+                INSERT INTO track_embeddings (track_id, embedding, model_version, analyzed_at)
+                VALUES %s
+                {EMBEDDING_UPSERT_CONFLICT}
+            """, rows, template='(%s, %s, %s, %s)', page_size=COPY_BATCH_SIZE)
+            if file_hashes:
+                self._insert_cache_entries(cursor, rows, file_hashes)
+
+            self.db.commit()
+            return {row[0] for row in rows}
 
+        except DB_CONNECTION_ERRORS:
+            raise
+        except Exception as e:
+            logger.warning(f"Batch embedding insert failed, retrying per track: {e}")
+            self.db.rollback()
+        finally:
+            cursor.close()
+
+        return self._store_embeddings_per_row(rows)
+
+    def store_embeddings_copy(self, rows: List[Tuple], file_hashes: Optional[Dict[str, bytes]] = None) -> set:
+        """
+        Bulk-load a large batch of embeddings via binary COPY.
+
+        Rows are streamed into a session-local staging table, then merged into
+        track_embeddings with a single INSERT ... SELECT ... ON CONFLICT. Used for
+        backfills; store_embeddings_batch remains the path for trickle workloads.
+
+        Args:
+            rows: List of (track_id, embedding, model_version, analyzed_at)
+            file_hashes: track_id -> content hash for newly computed embeddings
+
+        Returns:
+            Set of track IDs that were stored
+        """
+        rows = list({row[0]: row for row in rows}.values())
+
+        cursor = self.db.get_cursor()
+        try:
             cursor.execute("""
-                INSERT INTO track_embeddings (track_id, embedding, model_version, analyzed_at)
-                VALUES (%s, %s::vector, %s, %s)
-                ON CONFLICT (track_id)
-                DO UPDATE SET
-                    embedding = EXCLUDED.embedding,
-                    model_version = EXCLUDED.model_version,
-                    analyzed_at = EXCLUDED.analyzed_at
-            """, (track_id, embedding_list, MODEL_VERSION, datetime.utcnow()))
+                CREATE TEMP TABLE IF NOT EXISTS track_embeddings_staging
+                (LIKE track_embeddings INCLUDING DEFAULTS)
+                ON COMMIT DELETE ROWS
+            """)
+            cursor.copy_expert(
+                "COPY track_embeddings_staging (track_id, embedding, model_version, analyzed_at) "
+                "FROM STDIN WITH (FORMAT binary)",
+                _encode_copy_rows(rows)
+            )
+            # Join on Track so rows for tracks deleted mid-backfill are skipped
+            # instead of failing the whole merge on the foreign key. Unchanged rows
+            # are skipped by the WHERE, so every staged row whose track exists
+            # counts as stored.
+            cursor.execute(f"""
+                WITH merged AS (
+                    INSERT INTO track_embeddings (track_id, embedding, model_version, analyzed_at)
+                    SELECT s.track_id, s.embedding, s.model_version, s.analyzed_at
+                    FROM track_embeddings_staging s
+                    JOIN "Track" t ON t.id = s.track_id
+                    {EMBEDDING_UPSERT_CONFLICT}
+                )
+                SELECT s.track_id
+                FROM track_embeddings_staging s
+                JOIN "Track" t ON t.id = s.track_id
+            """)
+            stored = {row['track_id'] for row in cursor.fetchall()}
+            if file_hashes:
+                self._insert_cache_entries(cursor, rows, file_hashes)
 
             self.db.commit()
-            return True
+            return stored
 
+        except DB_CONNECTION_ERRORS:
+            raise
         except Exception as e:
-            logger.error(f"Failed to store embedding for {track_id}: {e}")
+            logger.warning(f"COPY embedding load failed, falling back to batched upsert: {e}")
+            self.db.rollback()
+        finally:
+            cursor.close()
+
+        return self.store_embeddings_batch(rows, file_hashes)
+
+    def _store_embeddings_per_row(self, rows: List[Tuple]) -> set:
+        """
+        Store embeddings one row at a time inside a single transaction.
+
+        Each row gets its own savepoint, so a failing row (e.g. its track was
+        deleted) is rolled back alone and the rest commit together once.
+        """
+        stored = set()
+        cursor = self.db.get_cursor()
+        try:
+            for track_id, embedding, model_version, analyzed_at in rows:
+                cursor.execute("SAVEPOINT store_embedding")
+                try:
+                    cursor.execute(f"""
+                        INSERT INTO track_embeddings (track_id, embedding, model_version, analyzed_at)
+                        VALUES (%s, %s, %s, %s)
+                        {EMBEDDING_UPSERT_CONFLICT}
+                    """, (track_id, embedding, model_version, analyzed_at))
+                    cursor.execute("RELEASE SAVEPOINT store_embedding")
+                    stored.add(track_id)
+                except DB_CONNECTION_ERRORS:
+                    raise
+                except Exception as e:
+                    logger.error(f"Failed to store embedding for {track_id}: {e}")
+                    cursor.execute("ROLLBACK TO SAVEPOINT store_embedding")
+
+            self.db.commit()
+            return stored
+
+        except DB_CONNECTION_ERRORS:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to store embeddings: {e}")
             traceback.print_exc()
             self.db.rollback()
-            return False
+            return set()
         finally:
             cursor.close()
 
@@ -539,7 +1398,9 @@ class TextEmbedHandler:
     Real-time text embedding handler via Redis pub/sub.
 
     Subscribes to text embedding requests and responds with embeddings
-    for natural language vibe queries.
+    for natural language vibe queries. Requests that arrive together are
+    embedded concurrently (so the inference thread batches them into one
+    forward) and answered with one pipelined round-trip.
     """
 
     def __init__(self, analyzer: CLAPAnalyzer, stop_event: threading.Event):
@@ -547,6 +1408,7 @@ class TextEmbedHandler:
         self.stop_event = stop_event
         self.redis_client = None
         self.pubsub = None
+        self._embed_pool: Optional[ThreadPoolExecutor] = None
 
     def start(self):
         """Start the text embed handler"""
@@ -556,6 +1418,9 @@ class TextEmbedHandler:
             self.redis_client = redis.from_url(REDIS_URL)
             self.pubsub = self.redis_client.pubsub()
             self.pubsub.subscribe(TEXT_EMBED_CHANNEL)
+            self._embed_pool = ThreadPoolExecutor(
+                max_workers=BATCH_SIZE, thread_name_prefix="TextEmbed"
+            )
 
             logger.info(f"Subscribed to channel: {TEXT_EMBED_CHANNEL}")
 
@@ -565,9 +1430,18 @@ class TextEmbedHandler:
                         ignore_subscribe_messages=True,
                         timeout=1.0
                     )
+                    if not message:
+                        continue
 
-                    if message and message['type'] == 'message':
-                        self._handle_message(message)
+                    # Drain whatever else is already buffered, up to BATCH_SIZE
+                    messages = [message]
+                    while len(messages) < BATCH_SIZE:
+                        message = self.pubsub.get_message(ignore_subscribe_messages=True)
+                        if not message:
+                            break
+                        messages.append(message)
+
+                    self._handle_messages([m for m in messages if m['type'] == 'message'])
 
                 except Exception as e:
                     logger.error(f"TextEmbedHandler error: {e}")
@@ -577,45 +1451,80 @@ class TextEmbedHandler:
         finally:
             if self.pubsub:
                 self.pubsub.close()
+            if self._embed_pool:
+                self._embed_pool.shutdown(wait=False)
             logger.info("TextEmbedHandler stopped")
 
-    def _handle_message(self, message):
-        """Handle a text embedding request"""
-        try:
-            data = message['data']
-            if isinstance(data, bytes):
-                data = data.decode('utf-8')
-
-            request = json.loads(data)
-            request_id = request.get('requestId')
-            text = request.get('text', '')
+    def _handle_messages(self, messages: List[dict]):
+        """Handle a batch of text embedding requests"""
+        requests_batch = []
+        for message in messages:
+            try:
+                # orjson parses the raw bytes directly
+                request = orjson.loads(message['data'])
+                if not isinstance(request, dict):
+                    raise ValueError(f"expected an object, got {type(request).__name__}")
+                request_id = request.get('requestId')
+                text = request.get('text', '')
+            except Exception as e:
+                logger.error(f"Failed to parse text embed request: {e}")
+                continue
 
-            if not request_id:
+            if not request_id or not isinstance(request_id, str):
                 logger.warning("Text embed request missing requestId")
-                return
+                continue
+            if not isinstance(text, str):
+                # Still answer, so the backend fails fast instead of timing out
+                logger.warning(f"Text embed request {request_id} has non-string text")
+                text = None
 
             logger.info(f"Processing text embed request: {request_id}")
+            requests_batch.append((request_id, text))
 
-            # Generate embedding
-            embedding = self.analyzer.get_text_embedding(text)
+        if not requests_batch:
+            return
 
-            # Prepare response
-            response = {
-                'requestId': request_id,
-                'success': embedding is not None,
-                'embedding': embedding.tolist() if embedding is not None else None,
-                'modelVersion': MODEL_VERSION
-            }
+        # Generate embeddings
+        embeddings = self._embed_pool.map(self._embed_one, requests_batch)
 
-            # Publish response to request-specific channel
-            response_channel = f"{TEXT_EMBED_RESPONSE_PREFIX}{request_id}"
-            self.redis_client.publish(response_channel, json.dumps(response))
+        # Publish each response to its request-specific channel in one round-trip
+        pipe = self.redis_client.pipeline(transaction=False)
+        for (request_id, _), embedding in zip(requests_batch, embeddings):
+            pipe.publish(
+                f"{TEXT_EMBED_RESPONSE_PREFIX}{request_id}",
+                orjson.dumps(self._build_response(request_id, embedding))
+            )
+        pipe.execute()
 
-            logger.info(f"Text embed response sent: {request_id}")
+        logger.info(f"Text embed responses sent: {', '.join(request_id for request_id, _ in requests_batch)}")
 
+    def _embed_one(self, item: Tuple[str, Optional[str]]) -> Optional[np.ndarray]:
+        """Embed one request; failures answer only that request with an error"""
+        request_id, text = item
+        if text is None:
+            return None
+        try:
+            return self.analyzer.get_text_embedding(text, self.redis_client)
         except Exception as e:
-            logger.error(f"Failed to handle text embed request: {e}")
-            traceback.print_exc()
+            logger.error(f"Text embed request {request_id} failed: {e}")
+            return None
+
+    def _build_response(self, request_id: str, embedding: Optional[np.ndarray]) -> dict:
+        """Build a response: raw float32 bytes (base64) avoid formatting 512 floats as text"""
+        response = {
+            'requestId': request_id,
+            'success': embedding is not None,
+            'embedding': (
+                base64.b64encode(embedding.astype('<f4', copy=False).tobytes()).decode('ascii')
+                if embedding is not None else None
+            ),
+            'modelVersion': MODEL_VERSION,
+            'protocolVersion': TEXT_EMBED_PROTOCOL_VERSION
+        }
+        if embedding is None:
+            # Subscribers check 'error' before decoding the embedding
+            response['error'] = 'Failed to generate text embedding'
+        return response
 
 
 class ControlHandler:
@@ -664,11 +1573,10 @@ class ControlHandler:
     def _handle_message(self, message):
         """Handle a control message"""
         try:
+            # orjson parses the raw bytes directly
             data = message['data']
-            if isinstance(data, bytes):
-                data = data.decode('utf-8')
 
-            control = json.loads(data)
+            control = orjson.loads(data)
             command = control.get('command')
 
             if command == 'set_workers':
@@ -683,6 +1591,84 @@ class ControlHandler:
             traceback.print_exc()
 
 
+def _backfill_outstanding(db: DatabaseConnection) -> bool:
+    """
+    True while any track still awaits an embedding: queueable (vibe status
+    NULL/pending with no embedding, as the backend enricher selects them)
+    or currently processing.
+    """
+    cursor = db.get_cursor()
+    try:
+        cursor.execute("""
+            SELECT EXISTS (
+                SELECT 1 FROM "Track" t
+                LEFT JOIN track_embeddings te ON t.id = te.track_id
+                WHERE t."filePath" IS NOT NULL
+                  AND (
+                      (te.track_id IS NULL
+                       AND (t."vibeAnalysisStatus" IS NULL OR t."vibeAnalysisStatus" = 'pending'))
+                      OR t."vibeAnalysisStatus" = 'processing'
+                  )
+            ) AS outstanding
+        """)
+        outstanding = cursor.fetchone()['outstanding']
+        db.commit()
+        return outstanding
+    finally:
+        cursor.close()
+
+
+def _drop_embedding_index(db: DatabaseConnection):
+    """Drop the ANN index ahead of a bulk backfill"""
+    cursor = db.get_cursor()
+    try:
+        cursor.execute(f'DROP INDEX IF EXISTS "{EMBEDDING_INDEX_NAME}"')
+        db.commit()
+        logger.info(f"Backfill mode: dropped {EMBEDDING_INDEX_NAME}, it will be rebuilt when the backlog is done")
+    finally:
+        cursor.close()
+
+
+def _create_embedding_index(db: DatabaseConnection):
+    """
+    Create the ANN index if it is missing (no-op when it already exists).
+
+    Builds CONCURRENTLY so workers can keep writing embeddings while the
+    index is built after a backfill.
+    """
+    cursor = db.get_cursor()
+    # CONCURRENTLY can't run inside a transaction block
+    db.rollback()
+    db.conn.autocommit = True
+    try:
+        start = time.time()
+        cursor.execute("SET maintenance_work_mem = %s", (INDEX_BUILD_MEMORY,))
+        cursor.execute("SET max_parallel_maintenance_workers = %s", (INDEX_BUILD_WORKERS,))
+
+        # An interrupted concurrent build leaves an INVALID index behind, which
+        # IF NOT EXISTS would otherwise keep forever
+        cursor.execute(
+            "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)",
+            (EMBEDDING_INDEX_NAME,)
+        )
+        row = cursor.fetchone()
+        if row and not row['indisvalid']:
+            logger.warning(f"Dropping invalid {EMBEDDING_INDEX_NAME} left by an interrupted build")
+            cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{EMBEDDING_INDEX_NAME}"')
+
+        cursor.execute(EMBEDDING_INDEX_DDL)
+        logger.info(f"Ensured {EMBEDDING_INDEX_NAME} ({time.time() - start:.1f}s)")
+    finally:
+        try:
+            cursor.execute("RESET maintenance_work_mem")
+            cursor.execute("RESET max_parallel_maintenance_workers")
+        except Exception:
+            pass  # Connection is broken; the caller reconnects
+        cursor.close()
+        if db.conn and not db.conn.closed:
+            db.conn.autocommit = False
+
+
 def main():
     """Main entry point"""
     logger.info("=" * 60)
@@ -692,8 +1678,13 @@ def main():
     logger.info(f"  Music path: {MUSIC_PATH}")
     logger.info(f"  Num workers: {NUM_WORKERS}")
     logger.info(f"  Threads per worker: {THREADS_PER_WORKER}")
+    logger.info(f"  Decode threads: {DECODE_THREADS}")
+    logger.info(f"  Inference CPUs: {_resolve_cpu_list(INFERENCE_CPU_LIST, 'inference') or 'unpinned'}")
+    logger.info(f"  Worker CPUs: {_resolve_cpu_list(WORKER_CPU_LIST, 'worker') or 'unpinned'}")
     logger.info(f"  Sleep interval: {SLEEP_INTERVAL}s")
     logger.info(f"  Model idle timeout: {MODEL_IDLE_TIMEOUT}s")
+    logger.info(f"  INT8 quantization: {'enabled' if QUANTIZE_INT8 else 'disabled'}")
+    logger.info(f"  Backfill mode: {'enabled' if BACKFILL_MODE else 'disabled'}")
     logger.info("=" * 60)
 
     # Load model once (shared across all workers)
@@ -710,8 +1701,35 @@ def main():
     signal.signal(signal.SIGTERM, signal_handler)
     signal.signal(signal.SIGINT, signal_handler)
 
+    # Connection for idle checks and ANN index management
+    idle_db = DatabaseConnection(DATABASE_URL)
+    idle_db.connect()
+
+    # A backfill interrupted before its rebuild leaves the index missing, so a
+    # normal start restores it
+    index_pending = False
+    try:
+        if BACKFILL_MODE:
+            _drop_embedding_index(idle_db)
+            index_pending = True
+        else:
+            _create_embedding_index(idle_db)
+    except Exception as e:
+        logger.error(f"Failed to prepare {EMBEDDING_INDEX_NAME}: {e}")
+        idle_db.reconnect()
+
     threads = []
 
+    # Start the inference thread (runs every CLAP forward pass). It has its own
+    # stop signal so it keeps serving until the threads feeding it have exited.
+    inference_stop = threading.Event()
+    inference_thread = threading.Thread(
+        target=analyzer.inference.start, args=(inference_stop,), name="InferenceService"
+    )
+    inference_thread.daemon = True
+    inference_thread.start()
+    logger.info("Started inference thread")
+
     # Start worker threads
     for i in range(NUM_WORKERS):
         worker = Worker(i, analyzer, stop_event)
@@ -738,8 +1756,6 @@ def main():
     logger.info("Started control handler thread")
 
     # Main loop: monitor idle state and unload model when not needed
-    idle_db = DatabaseConnection(DATABASE_URL)
-    idle_db.connect()
     try:
         while not stop_event.is_set():
             time.sleep(5)
@@ -766,18 +1782,48 @@ def main():
                     except Exception as e:
                         logger.debug(f"Idle check failed: {e}")
                         idle_db.reconnect()
+
+            # The enricher feeds the queue in small batches, so an empty queue alone
+            # doesn't mean the backfill is over; wait until no track is left to embed
+            if index_pending and time.time() - analyzer.last_work_time >= SLEEP_INTERVAL * 2:
+                try:
+                    if (redis.from_url(REDIS_URL).llen(ANALYSIS_QUEUE) == 0
+                            and not _backfill_outstanding(idle_db)):
+                        _create_embedding_index(idle_db)
+                        index_pending = False
+                except Exception as e:
+                    logger.debug(f"Backfill index check failed: {e}")
+                    idle_db.reconnect()
     except KeyboardInterrupt:
         logger.info("Keyboard interrupt received")
         stop_event.set()
 
-    # Cleanup
-    idle_db.close()
-
     # Wait for threads to finish
     logger.info("Waiting for threads to finish...")
     for thread in threads:
         thread.join(timeout=10)
 
+    # Stopping inference fails its queued requests, which a still-running worker
+    # would record as track failures. If one is stuck, exit with it instead: its
+    # tracks stay 'processing' and the backend's stale-job cleanup requeues them.
+    if any(thread.is_alive() for thread in threads):
+        logger.warning("Threads still running after shutdown timeout, leaving inference up")
+    else:
+        inference_stop.set()
+        inference_thread.join(timeout=10)
+
+    # Workers have flushed their COPY buffers, so the backfilled rows are all in
+    if index_pending:
+        try:
+            _create_embedding_index(idle_db)
+        except Exception as e:
+            logger.error(f"Failed to rebuild {EMBEDDING_INDEX_NAME}, it will be created on next start: {e}")
+
+    # Cleanup
+    idle_db.close()
+    if _db_pool:
+        _db_pool.closeall()
+
     logger.info("CLAP Analyzer service stopped")
 
 